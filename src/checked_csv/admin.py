@@ -1,26 +1,102 @@
 from django.db.models.fields import Field
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 from django.utils.translation import gettext_lazy as _
 from django.template.response import TemplateResponse
-from django.core.exceptions import PermissionDenied
+from django.core.exceptions import PermissionDenied, ValidationError, NON_FIELD_ERRORS
 from django.urls import reverse_lazy
 import csv
+import codecs
+import io
+import operator
 import urllib.parse
 from .forms import ImportForm
 from pandas import pandas as pd
 from django.shortcuts import redirect
 from django.forms import modelform_factory
-from django.core.files.storage import FileSystemStorage
-from os import path
 import numpy as np
-from deepdiff import DeepDiff
-from functools import reduce, cache
-from itertools import chain, filterfalse
-from django.db import transaction
+from functools import cached_property, reduce
+from itertools import chain, islice
+from django.db import transaction, connections, router
+from django.db.models import AutoField, NOT_PROVIDED, Q
+import gc
 import logging
+from datetime import date, time, timedelta
+from decimal import Decimal
+from uuid import UUID
+from concurrent.futures import ProcessPoolExecutor
 
 logging.getLogger(__name__)
 
+# Marks a csv value or row which failed to be cleaned by its form field or model field
+INVALID = object()
+
+RECORD_NOT_FOUND_MESSAGE = _('The record to update was not found, or is locked by another import.')
+
+# Fields whose database values are not plain scalars, they can not be written by COPY text
+COPY_UNSUPPORTED_TYPES = frozenset((
+    'JSONField', 'BinaryField', 'ArrayField', 'HStoreField',
+    'IntegerRangeField', 'BigIntegerRangeField', 'DecimalRangeField', 'DateRangeField', 'DateTimeRangeField',
+))
+
+# Number of unique keys looked up by one query, small enough for the expression depth limit of SQLite(1000)
+KEY_LOOKUP_BATCH_SIZE = 200
+
+# Error codes of ModelForm for the unique constraint violation
+UNIQUE_ERROR_CODES = frozenset(('unique', 'unique_together'))
+
+# Cleaned values of these types can be shared between rows
+IMMUTABLE_TYPES = (str, int, float, Decimal, date, time, timedelta, UUID)
+
+class Echo:
+    """
+    A file-like object which returns the written value instead of storing it, to stream csv rows.
+    """
+    def write(self, value):
+        return value
+
+def clean_records(fields: list[Field], form_fields: list, records: list) -> list:
+    """
+    Clean records column by column, return the cleaned data of each record, or INVALID if it has an invalid value.
+    Clean by the form field first, so a value which fails here surely fails in the ModelForm too.
+    """
+    def clean_column(field, form_field):
+        # Csv columns often repeat the same values, so clean each distinct value only once
+        cleaned_values = {}
+
+        def clean(value):
+            if value in cleaned_values:
+                return cleaned_values[value]
+
+            try:
+                cleaned = field.clean(form_field.clean(value), None)
+            except ValidationError:
+                cleaned = INVALID
+            # A mutable value, e.g. of a JSONField, must not be shared between rows
+            if cleaned is None or cleaned is INVALID or isinstance(cleaned, IMMUTABLE_TYPES):
+                cleaned_values[value] = cleaned
+            return cleaned
+
+        return [clean(r[field.name]) for r in records]
+
+    columns = [clean_column(f, ff) for f, ff in zip(fields, form_fields)]
+    return [
+        INVALID if any(v is INVALID for v in values) else dict(zip([f.name for f in fields], values))
+        for values in zip(*columns)
+    ]
+
+def clean_records_in_worker(app_label: str, model_name: str, field_names: list[str], records: list) -> list:
+    """
+    clean_records() run by a worker process. INVALID can not be pickled back as it is, so None is returned instead.
+    """
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+    opts = apps.get_model(app_label, model_name)._meta
+    fields = [opts.get_field(f) for f in field_names]
+    return [None if r is INVALID else r for r in clean_records(fields, [f.formfield() for f in fields], records)]
+
 class CsvExportModelMixin():
     """
     This is intended to be mixed with django.contrib.admin.ModelAdmin
@@ -34,6 +110,7 @@ class CsvExportModelMixin():
         - csv_export_fields: using to choose export fields.
         - is_export_verbose_names: whether or not export verbose field names at the first row
         - is_export_field_names: whether or not export field names
+        - export_chunk_size: number of rows to be fetched from the database at a time
         - fmt_params: 
     """
     class csv_quote_all(csv.excel):
@@ -50,42 +127,52 @@ class CsvExportModelMixin():
     exclude_csv_export_fields = []
     is_export_verbose_names = False
     is_export_field_names = True
+    export_chunk_size = 2000
 
     fmt_params = {}
     
     actions = ['csv_export']
     logger = logging.getLogger(__name__)
 
+    def is_exportable_field(self, field) -> bool:
+        return (field.concrete
+            and not getattr(field, 'many_to_many')
+            and (not self.csv_export_fields or field.name in self.csv_export_fields)
+            and (not self.exclude_csv_export_fields or field.name not in self.exclude_csv_export_fields)
+        )
+
+    def get_csv_export_fields(self) -> list[Field]:
+        """
+        Hook for the fields to export. Deprecated for callers, use csv_export_field_list which calls this once.
+        """
+        return [f for f in self.model._meta.get_fields() if self.is_exportable_field(f)]
+
+    @cached_property
+    def csv_export_field_list(self) -> list[Field]:
+        return self.get_csv_export_fields()
+
     def csv_export(self, request, queryset):
         opts = self.model._meta
-    
-        def get_csv_export_fields():
-            def is_exportable(field):
-                return (field.concrete
-                    and not getattr(field, 'many_to_many')
-                    and (not self.csv_export_fields or field.name in self.csv_export_fields)
-                    and (not self.exclude_csv_export_fields or field.name not in self.exclude_csv_export_fields)
-                )
-
-            return [f for f in opts.get_fields() if is_exportable(f)]
 
         filename = self.file_name if self.file_name else urllib.parse.quote(opts.verbose_name_plural + ".csv")
         logging.info(f'Exporting {opts.model_name}.')
 
-        response = HttpResponse(content_type='text/csv; encoding=%s' %(self.encoding) )
-        response['Content-Disposition'] = 'attachment; filename=%s' % (filename)
-        writer = csv.writer(response, self.dialect)
+        export_fields = self.csv_export_field_list
+        csv_field_names = [f.name for f in export_fields]
+        writer = csv.writer(Echo(), self.dialect)
 
-        csv_field_names = [f.name for f in get_csv_export_fields()]
-        if self.is_export_verbose_names:
-            writer.writerow([opts.get_field(f).verbose_name.title() for f in csv_field_names ])
+        def rows():
+            if self.is_export_verbose_names:
+                yield writer.writerow([f.verbose_name.title() for f in export_fields])
 
-        if self.is_export_field_names:
-            writer.writerow(csv_field_names)
+            if self.is_export_field_names:
+                yield writer.writerow(csv_field_names)
 
-        for row in queryset.values_list(*csv_field_names):
-            writer.writerow(row)
-        
+            for row in queryset.values_list(*csv_field_names).iterator(chunk_size=self.export_chunk_size):
+                yield writer.writerow(row)
+
+        response = StreamingHttpResponse(rows(), content_type='text/csv; encoding=%s' %(self.encoding) )
+        response['Content-Disposition'] = 'attachment; filename=%s' % (filename)
         return response
 
     csv_export.short_description = _('CSV Export')
@@ -100,8 +187,13 @@ class CsvImportModelMixin():
         - csv_import_fields: Field names to import, if not specified, header line is used.
         - csv_excluded_fields: Field names to exclude from import.
         - import_encoding: shift_jis, utf8,...etc.
-        - chunk_size: number of rows to be read into a dataframe at a time
+        - chunk_size: number of rows to be read at a time
+        - csv_reader: 'csv' reads the csv file by the csv module, 'pandas' by pandas dataframes, 'pyarrow' by pyarrow(needs to be installed)
+        - import_parallelism: number of worker processes to validate a chunk, 1 validates it in the request process
         - max_error_rows: maximum number of violation error rows
+        - bulk_create_batch_size: number of rows inserted per query, if not specified, it is derived from the number of import fields
+        - bulk_update_batch_size: number of rows updated per query, if not specified, it is derived from the number of import fields
+        - is_copy_insert: whether or not insert new rows by COPY instead of bulk_create, only for PostgreSQL
     """
     csv_import_fields = []
     csv_excluded_fields = []
@@ -111,7 +203,12 @@ class CsvImportModelMixin():
     # import_encoding = 'shift_jis'
 
     chunk_size = 10000
+    csv_reader = 'csv'
+    import_parallelism = 1
     max_error_rows = 1000
+    bulk_create_batch_size = None
+    bulk_update_batch_size = None
+    is_copy_insert = False
     is_skip_existing = False        # True: skip imported row, False: update database with imported row
 
     is_first_comer_priority = True  # True: Inside a same chunk, first comer is saved to database. False: last was saved
@@ -153,19 +250,54 @@ class CsvImportModelMixin():
         ]
         return import_url + super(CsvImportModelMixin, self).get_urls()
 
-    @cache
+    def is_importable_field(self, field) -> bool:
+        return (field.concrete
+            and not getattr(field, 'many_to_many')
+            and (not self.csv_import_fields or field.name in self.csv_import_fields)
+            and (not self.get_csv_excluded_fields() or field.name not in self.get_csv_excluded_fields())
+        )
+
     def get_csv_import_fields(self) -> list[Field]:
-        def is_importable_fields(field):
-            return (field.concrete
-                and not getattr(field, 'many_to_many')
-                and (not self.csv_import_fields or field.name in self.csv_import_fields)
-                and (not self.get_csv_excluded_fields() or field.name not in self.get_csv_excluded_fields())
-            )
+        """
+        Hook for the fields to import. Deprecated for callers, use csv_import_field_list which calls this once.
+        """
+        return [f for f in self.model._meta.get_fields() if self.is_importable_field(f)]
+
+    @cached_property
+    def csv_import_field_list(self) -> list[Field]:
+        return self.get_csv_import_fields()
+
+    @staticmethod
+    def _disable_formfield(db_field, **kwargs):
+        form_field = db_field.formfield(**kwargs)
+        if form_field:
+            form_field.widget.attrs['disabled'] = 'true'
+        return form_field
+
+    @cached_property
+    def _modelform_class(self):
+        """
+        Dynamically generated ModelForm class to check the imported rows, built once per admin instance.
+        """
+        # modelform_class = globals()[opts.object_name + 'Form']
+        return modelform_factory(self.model, fields=[f.name for f in self.csv_import_field_list],
+                                 formfield_callback=self._disable_formfield)
 
-        return [f for f in self.model._meta.get_fields() if is_importable_fields(f)]
+    @cached_property
+    def unique_check_field_list(self) -> tuple[str]:
+        """
+        A flat tuple of field names to partition and deduplicate the imported rows.
+        """
+        unique_fields = self.get_unique_check_fields()
+        # Accept the unique_together style, e.g. (('company', 'code'),)
+        if unique_fields and isinstance(unique_fields[0], (tuple, list)):
+            return tuple(unique_fields[0])
+        return tuple(unique_fields)
 
-    @cache
     def get_unique_check_fields(self) -> tuple[str]:
+        """
+        Hook for the unique fields of the imported rows. Deprecated for callers, use unique_check_field_list which calls this once.
+        """
         if self.unique_check_fields:
             return self.unique_check_fields
         
@@ -195,9 +327,16 @@ class CsvImportModelMixin():
         """
         return {}
 
+    def get_csv_excluded_fields_update_values(self, request) -> dict:
+        """
+        Hook for updating excluded fields of the updated rows, if necessary, such as 'updater', 'updated_at', and 'version'.
+        It is called once per import, values can be expressions like F('version') + 1.
+        """
+        return {}
+
     def update_csv_excluded_fields(self, request, row) -> None:
         """
-        Hook for updating excluded fields, if necessary, such as 'updater', 'updated_at', and 'version'
+        Deprecated: called per row, use get_csv_excluded_fields_update_values instead.
         """
         pass
 
@@ -205,67 +344,378 @@ class CsvImportModelMixin():
         """
         When a database rocord is duplicated with a imported row, tell which fields should be updated using the csv data. 
         """
-        return [f.name for f in self.get_csv_import_fields() if not f.primary_key]
+        return [f.name for f in self.csv_import_field_list if not f.primary_key]
+
+    def get_default_batch_size(self) -> int:
+        """
+        Keep the number of query parameters of a batch under the limit of the database(65535 for PostgreSQL).
+        """
+        return min(1000, 65535 // max(1, len(self.csv_import_field_list) * 2))
+
+    def get_bulk_create_batch_size(self) -> int:
+        return self.bulk_create_batch_size or self.get_default_batch_size()
+
+    def get_bulk_update_batch_size(self) -> int:
+        return self.bulk_update_batch_size or self.get_default_batch_size()
+
+    def insert_rows(self, rows: list) -> None:
+        """
+        Insert newly imported rows by COPY if is_copy_insert is set and the database is PostgreSQL, otherwise by bulk_create.
+        COPY can not ignore conflicts, so bulk_create is used when is_skip_existing is set.
+        """
+        connection = connections[router.db_for_write(self.model)]
+        copy_fields = self.get_copy_fields() if self.is_copy_insert and not self.is_skip_existing else []
+        if copy_fields and connection.vendor == 'postgresql':
+            self.copy_rows(connection, rows, copy_fields)
+        else:
+            self.model.objects.bulk_create(rows, batch_size=self.get_bulk_create_batch_size(),
+                                           ignore_conflicts=self.is_skip_existing)
+
+    def get_copy_fields(self) -> list[Field]:
+        """
+        Columns written by COPY, the same ones as bulk_create writes.
+        Return an empty list to fall back to bulk_create, if a field value can not be written as plain COPY text,
+        e.g. the driver adapters of JSON or array values, binary data, or database default expressions.
+        """
+        fields = [f for f in self.model._meta.concrete_fields
+                  if not isinstance(f, AutoField) and not getattr(f, 'generated', False)]
+        if any(f.get_internal_type() in COPY_UNSUPPORTED_TYPES
+               or getattr(f, 'db_default', NOT_PROVIDED) is not NOT_PROVIDED for f in fields):
+            return []
+        return fields
+
+    def copy_rows(self, connection, rows: list, fields: list[Field]) -> None:
+        """
+        Insert rows by COPY FROM STDIN in the text format, which skips the parameter handling of INSERT.
+        """
+        def to_copy_text(value):
+            if value is None:
+                return '\\N'
+            return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+        opts = self.model._meta
+        buffer = io.StringIO()
+        for row in rows:
+            values = [f.get_db_prep_save(f.pre_save(row, True), connection) for f in fields]
+            buffer.write('\t'.join(to_copy_text(v) for v in values) + '\n')
+
+        sql = 'COPY %s (%s) FROM STDIN' % (
+            connection.ops.quote_name(opts.db_table),
+            ', '.join(connection.ops.quote_name(f.column) for f in fields),
+        )
+        with connection.cursor() as cursor:
+            if hasattr(cursor, 'copy_expert'):
+                # psycopg2
+                buffer.seek(0)
+                cursor.copy_expert(sql, buffer)
+            else:
+                # psycopg 3
+                with cursor.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
 
     @transaction.non_atomic_requests
     def import_action(self, request, *args, **kwargs):
         """
         """
+        def all_errors(modelform):
+            for errorlist in modelform.errors.values():
+                yield from errorlist.as_data()
+
         def has_nonunique_violation(modelform):
             """
-            Collect all error codes except the unique contraint violation.
+            Whether or not there is any error except the unique contraint violation.
             """
-            return list(filterfalse(lambda e: e.code in ['unique', 'unique_together'],
-                [e for e in chain.from_iterable([errorlist.as_data() for errorlist in modelform.errors.values()])]
-            ))
+            return any(e.code not in UNIQUE_ERROR_CODES for e in all_errors(modelform))
 
         def get_unique_constraint_violation_fields(modelform) -> tuple[str]:
-            error = next(filter(lambda e: e.code in ['unique', 'unique_together'],
-                [e for e in chain.from_iterable([errorlist.as_data() for errorlist in modelform.errors.values()])]
-            ))
+            error = next(e for e in all_errors(modelform) if e.code in UNIQUE_ERROR_CODES)
 
             return error.params['unique_check']
 
-        def exclude_duplication(rows, imported, modelform):
-            unique_fields = self.get_unique_check_fields()
+        def exclude_duplication(seen: dict, imported):
+            """
+            Keep only one row per unique key inside a chunk, the first or the last one depending on is_first_comer_priority.
+            """
+            unique_fields = self.unique_check_field_list
             if not unique_fields:
-                return imported
+                seen[len(seen)] = imported
+                return
 
-            return reduce(lambda p, n: p if self.is_first_comer_priority else n, [
-                    row for row in rows if not any(
-                        [DeepDiff(getattr(row, f), getattr(imported, f), ignore_order=True) for f in unique_fields]
-                    )
-                ], imported
-            )
+            key = tuple(getattr(imported, f) for f in unique_fields)
+            existing = seen.get(key)
+            seen[key] = existing if existing is not None and self.is_first_comer_priority else imported
+
+        def add_error(errors: list, row_number: int, record: dict, messages: dict):
+            # Keep only the messages, so the ModelForm can be released right away
+            if len(errors) < self.max_error_rows:
+                errors.append({
+                    'row_number': row_number,
+                    'errors': {k: [str(e) for e in v] for k, v in messages.items()},
+                    'data': record,
+                })
 
-        def read_record(request, new_rows: list, update_rows: list, errors: list, record: dict):
-            def add_error(errors: list, modelform):
-                if len(errors) < self.max_error_rows:
-                    errors.append(modelform)
+        def read_record(request, seen_new: dict, pending: list, errors: list, row_number: int, record: dict):
 
             # Create an instance of the ModelForm class using one record of the csv data
-            modelform = modelform_class(self.get_csv_excluded_fields_init_values(request) | record)
+            modelform = modelform_class(init_values | record)
             if modelform.is_valid():
                 # newly imported data
-                row = self.model(**(self.get_csv_excluded_fields_init_values(request) | modelform.cleaned_data))
-                new_rows.append(exclude_duplication(new_rows, row, modelform))
+                row = self.model(**row_init_values, **modelform.cleaned_data)
+                exclude_duplication(seen_new, row)
             else:
                 if has_nonunique_violation(modelform):
-                    add_error(errors, modelform)
+                    add_error(errors, row_number, record, modelform.errors)
                 else:
                     if not self.is_skip_existing:
-                        row = self.model.objects.get(**{k : record[k] for k in get_unique_constraint_violation_fields(modelform)})
-                        # If we had same record in database, would update it by imported data
-                        for k, v in modelform.cleaned_data.items():
-                            setattr(row, k, v)
-                        self.update_csv_excluded_fields(request, row)
-                        update_rows.append(exclude_duplication(update_rows, row, modelform))
-
-        def disable_formfield(db_field, **kwargs):
-            form_field = db_field.formfield(**kwargs)
-            if form_field:
-                form_field.widget.attrs['disabled'] = 'true'
-            return form_field
+                        # The database record is fetched later together with the other rows of the chunk
+                        unique_check = tuple(get_unique_constraint_violation_fields(modelform))
+                        # Use the values validated by the form(stripped, timezone aware...), not the raw csv text
+                        key = tuple(getattr(modelform.instance, opts.get_field(k).attname) for k in unique_check)
+                        pending.append((unique_check, key, modelform, row_number, record))
+
+        def get_key_batch_size(field_count: int) -> int:
+            """
+            Number of unique keys looked up by one query, under the query parameter limit of the database.
+            """
+            connection = connections[router.db_for_write(self.model)]
+            max_query_params = connection.features.max_query_params or KEY_LOOKUP_BATCH_SIZE * field_count
+            return max(1, min(KEY_LOOKUP_BATCH_SIZE, max_query_params // field_count))
+
+        def get_locking_queryset():
+            """
+            Queryset locking the records to update, skipping the records locked by another import.
+            """
+            connection = connections[router.db_for_write(self.model)]
+            return self.model._default_manager.select_for_update(
+                skip_locked=connection.features.has_select_for_update_skip_locked
+            )
+
+        def get_existing_rows(unique_check: tuple, keys: list) -> dict:
+            """
+            Fetch and lock the database records of a unique check by one query, keyed by the values of the unique fields.
+            Records locked by another import are skipped, that import will update them.
+            """
+            queryset = get_locking_queryset()
+            fields = [opts.get_field(f) for f in unique_check]
+            if len(fields) == 1:
+                field, values = fields[0], [k[0] for k in keys]
+                if field.unique and not field.is_relation:
+                    return {(k,): v for k, v in queryset.in_bulk(values, field_name=field.name).items()}
+                # Unique by unique_together or a constraint only, which in_bulk does not accept
+                rows = {}
+                batch_size = get_key_batch_size(1)
+                for i in range(0, len(values), batch_size):
+                    rows.update({
+                        (getattr(r, field.attname),): r
+                        for r in queryset.filter(**{'%s__in' % field.attname: values[i:i + batch_size]})
+                    })
+                return rows
+
+            # An OR of the exact keys, so only the target records are locked
+            rows = {}
+            batch_size = get_key_batch_size(len(fields))
+            for i in range(0, len(keys), batch_size):
+                condition = reduce(operator.or_, (
+                    Q(**{f.attname: v for f, v in zip(fields, key)}) for key in keys[i:i + batch_size]
+                ))
+                rows.update({tuple(getattr(r, f.attname) for f in fields): r for r in queryset.filter(condition)})
+            return rows
+
+        def read_pending_updates(request, seen_upd: dict, pending: list, errors: list):
+            keys_by_check = {}
+            for unique_check, key, *rest in pending:
+                keys_by_check.setdefault(unique_check, []).append(key)
+            existing = {c: get_existing_rows(c, keys) for c, keys in keys_by_check.items()}
+
+            updated = set()
+            for unique_check, key, modelform, row_number, record in pending:
+                row = existing[unique_check].get(key)
+                if row is None:
+                    # The database may match keys which python does not, e.g. by a case insensitive collation
+                    found = get_locking_queryset().filter(
+                        **{opts.get_field(f).attname: v for f, v in zip(unique_check, key)}
+                    ).first()
+                    if found is not None:
+                        row = next((r for r in existing[unique_check].values() if r.pk == found.pk), found)
+                        existing[unique_check][key] = row
+                if row is None:
+                    logging.warning(f'The record of row {row_number} to update was not found in {opts.model_name}.')
+                    add_error(errors, row_number, record, {NON_FIELD_ERRORS: [RECORD_NOT_FOUND_MESSAGE]})
+                    continue
+                if self.is_first_comer_priority and id(row) in updated:
+                    continue
+
+                # If we had same record in database, would update it by imported data
+                for k, v in modelform.cleaned_data.items():
+                    setattr(row, k, v)
+                for k, v in plain_update_values.items():
+                    setattr(row, k, v)
+                self.update_csv_excluded_fields(request, row)
+                updated.add(id(row))
+                exclude_duplication(seen_upd, row)
+
+        def get_cleanable_fields(columns) -> list[Field]:
+            """
+            Fields which can be cleaned column by column without the ModelForm.
+            Return an empty list when every row has to go through the ModelForm, e.g. relations, missing columns
+            or date based unique checks which only the ModelForm validates.
+            """
+            fields = [f for f in self.csv_import_field_list if f.name in modelform_class.base_fields]
+            if not fields or any(
+                f.is_relation or f.name not in columns or f.unique_for_date or f.unique_for_month or f.unique_for_year
+                for f in fields
+            ):
+                return []
+            return fields
+
+        def clean_in_parallel(executor, fields, records: list) -> list:
+            """
+            Partition a chunk by the unique check fields and clean the partitions by worker processes.
+            """
+            unique_fields = self.unique_check_field_list
+            partitions = [[] for _ in range(self.import_parallelism)]
+            for i, record in enumerate(records):
+                key = hash(tuple(record.get(f) for f in unique_fields)) if unique_fields else i
+                partitions[key % self.import_parallelism].append(i)
+
+            field_names = [f.name for f in fields]
+            futures = [executor.submit(clean_records_in_worker, opts.app_label, opts.model_name, field_names,
+                                       [records[i] for i in partition]) for partition in partitions]
+
+            cleaned_rows = [None] * len(records)
+            for partition, future in zip(partitions, futures):
+                for i, cleaned_data in zip(partition, future.result()):
+                    cleaned_rows[i] = INVALID if cleaned_data is None else cleaned_data
+            return cleaned_rows
+
+        def exclude_existing(fields, cleaned_rows: list) -> None:
+            """
+            Rows which collide with a database record need the ModelForm to detect the unique violation, so mark them invalid.
+            """
+            field_names = {f.name for f in fields}
+            unique_checks = [(f.name,) for f in fields if f.unique] + [
+                tuple(c) for c in chain(opts.unique_together, (c.fields for c in opts.total_unique_constraints))
+            ]
+            for check in filter(lambda c: field_names.issuperset(c), unique_checks):
+                indexes = [i for i, r in enumerate(cleaned_rows)
+                           if isinstance(r, dict) and all(r[f] is not None for f in check)]
+                batch_size = get_key_batch_size(len(check))
+                for j in range(0, len(indexes), batch_size):
+                    batch = indexes[j:j + batch_size]
+                    # The database decides the equality(e.g. case insensitive collations), not python,
+                    # so every row of a batch with any hit goes to the ModelForm
+                    if self.model._default_manager.filter(
+                        **{'%s__in' % f: {cleaned_rows[i][f] for i in batch} for f in check}
+                    ).exists():
+                        for i in batch:
+                            cleaned_rows[i] = None
+
+        def clean_chunk(records: list, executor) -> list:
+            """
+            Validate a chunk column by column, return the cleaned data of each row,
+            INVALID if the row has an invalid value, or None if the row needs the ModelForm.
+            """
+            fields = get_cleanable_fields(records[0].keys() if records else ())
+            if not fields:
+                return [None] * len(records)
+
+            if executor:
+                cleaned_rows = clean_in_parallel(executor, fields, records)
+            else:
+                cleaned_rows = clean_records(fields, [modelform_class.base_fields[f.name] for f in fields], records)
+            exclude_existing(fields, cleaned_rows)
+            return cleaned_rows
+
+        def validate_constraints(row) -> None:
+            """
+            Run the model constraints like the ModelForm does(Django 4.1+), e.g. CheckConstraint or conditional UniqueConstraint.
+            The total unique constraints are skipped, exclude_existing has checked them for the whole chunk.
+            """
+            if not hasattr(row, 'validate_constraints'):
+                return
+
+            using = router.db_for_write(self.model, instance=row)
+            for model_class, constraints in row.get_constraints():
+                for constraint in constraints:
+                    if constraint not in opts.total_unique_constraints:
+                        constraint.validate(model_class, row, exclude=constraint_exclude, using=using)
+
+        def read_cleaned_record(request, seen_new: dict, pending: list, errors: list, row_number: int, record: dict, cleaned_data: dict):
+            if cleaned_data is INVALID and len(errors) >= self.max_error_rows:
+                # No need to build a ModelForm for an error row which can not be reported any more
+                return
+
+            if isinstance(cleaned_data, dict):
+                row = self.model(**row_init_values, **cleaned_data)
+                try:
+                    row.clean()
+                    validate_constraints(row)
+                except ValidationError:
+                    pass
+                else:
+                    exclude_duplication(seen_new, row)
+                    return
+
+            # Fall back to the ModelForm to get the unique violation or human readable error messages
+            read_record(request, seen_new, pending, errors, row_number, record)
+
+        def read_header(file, encoding) -> list[str]:
+            text = io.TextIOWrapper(file, encoding=encoding, newline='')
+            try:
+                return next(csv.reader(text), [])
+            finally:
+                # Keep the uploaded file open for the reader
+                text.detach()
+                file.seek(0)
+
+        def read_pyarrow_chunks(file, encoding):
+            """
+            Read the csv file by pyarrow, its blocks are split into chunk_size rows at a time.
+            """
+            import pyarrow as pa
+            from pyarrow import csv as pa_csv
+
+            # Keep every column as a string like the other readers, pyarrow needs the column names for that
+            column_names = read_header(file, encoding)
+            reader = pa_csv.open_csv(file,
+                read_options=pa_csv.ReadOptions(block_size=16 << 20, encoding=self.import_encoding),
+                convert_options=pa_csv.ConvertOptions(column_types={n: pa.string() for n in column_names},
+                                                      strings_can_be_null=False, quoted_strings_can_be_null=False),
+            )
+            records = []
+            for batch in reader:
+                records.extend(batch.to_pylist())
+                while len(records) >= self.chunk_size:
+                    yield records[:self.chunk_size]
+                    records = records[self.chunk_size:]
+            if records:
+                yield records
+
+        def read_chunks(file):
+            """
+            Yield the uploaded csv file as lists of records, chunk_size rows at a time.
+            """
+            file.seek(0)
+            if self.csv_reader == 'pandas':
+                read_csv_params = {'encoding' : self.import_encoding, 
+                                   'chunksize' : self.chunk_size,
+                                   'na_filter' : False,
+                                   'dtype' : 'str'
+                                  }
+                for chunk in pd.read_csv(file, **read_csv_params):
+                    # Build the records from plain tuples, which is cheaper than to_dict(orient='records')
+                    columns = list(chunk.columns)
+                    yield [dict(zip(columns, values)) for values in chunk.itertuples(index=False, name=None)]
+                return
+
+            # Drop the BOM like pandas does
+            encoding = 'utf-8-sig' if codecs.lookup(self.import_encoding).name == 'utf-8' else self.import_encoding
+            if self.csv_reader == 'pyarrow':
+                yield from read_pyarrow_chunks(file, encoding)
+                return
+
+            reader = csv.DictReader(io.TextIOWrapper(file, encoding=encoding, newline=''), restval='')
+            yield from iter(lambda: list(islice(reader, self.chunk_size)), [])
 
         if not self.has_import_permission(request):
             raise PermissionDenied
@@ -287,50 +737,76 @@ class CsvImportModelMixin():
             form = ImportForm(request.POST, request.FILES)
             if form.is_valid():
                 import_file = form.cleaned_data['import_file']
-                # I have to save the file to file system before read into pandas, otherwise the encoding is ignored by pandas.
-                fs = FileSystemStorage('temp')
-                file_name = fs.save(import_file.name, import_file)
-                file_path = path.join(fs.location, file_name)
-                logging.info(f'Importing {opts.model_name} from {file_path}.')
-
-                model_field_names = [f.name for f in self.get_csv_import_fields()]
-                # Dynamically generate ModelForm class
-                # modelform_class = globals()[opts.object_name + 'Form']
-                modelform_class = modelform_factory(self.model, fields = model_field_names, formfield_callback = disable_formfield)
+                # Read the uploaded file as it is, small uploads stay in memory and large ones in their temporary file
+                logging.info(f'Importing {opts.model_name} from {import_file.name}.')
+
+                modelform_class = self._modelform_class
+
+                # The hook only depends on the request, so call it once per import instead of per row.
+                # Cleaned data has priority over the initial values when building a model instance.
+                init_values = self.get_csv_excluded_fields_init_values(request)
+                row_init_values = {k: v for k, v in init_values.items() if k not in modelform_class.base_fields}
+                # Plain update values are set to the rows and saved by bulk_update, expressions need their own UPDATE
+                update_values = self.get_csv_excluded_fields_update_values(request)
+                expression_update_values = {k: v for k, v in update_values.items() if hasattr(v, 'resolve_expression')}
+                plain_update_values = {k: v for k, v in update_values.items() if k not in expression_update_values}
+                base_update_fields = self.get_update_fields()
+                update_fields = [*base_update_fields, *(k for k in plain_update_values if k not in base_update_fields)]
+                # The ModelForm does not validate the constraints of fields out of the form
+                constraint_exclude = {f.name for f in opts.fields if f.name not in modelform_class.base_fields}
 
-                read_csv_params = {'encoding' : self.import_encoding, 
-                                   'chunksize' : self.chunk_size,
-                                   'na_filter' : False,
-                                   'dtype' : 'str'
-                                  }
                 errors = []
+                row_number = 1      # the header row
+                # Only the validation is parallelized, the database is written by this process
+                executor = ProcessPoolExecutor(self.import_parallelism) if self.import_parallelism > 1 else None
                 try:
-                    for chunk in pd.read_csv(file_path, **read_csv_params):
-                        # df = chunk.replace(np.nan, '', regex=True)
-                        # df = chunk.applymap(str)
-                        new_rows = []
-                        update_rows = []
+                    for chunk in read_chunks(import_file.file):
+                        seen_new = {}
+                        seen_upd = {}
+                        pending = []
                         with transaction.atomic():
-                            for record in chunk.to_dict('record'):
-                                read_record(request, new_rows, update_rows, errors, record)
+                            for record, cleaned_data in zip(chunk, clean_chunk(chunk, executor)):
+                                row_number += 1
+                                read_cleaned_record(request, seen_new, pending, errors, row_number, record, cleaned_data)
+                            read_pending_updates(request, seen_upd, pending, errors)
+
+                            new_rows = list(seen_new.values())
+                            update_rows = list(seen_upd.values())
 
                             if new_rows:
-                                self.model.objects.bulk_create(new_rows)
+                                self.insert_rows(new_rows)
                                 logging.info(f'There are {len(new_rows)} new rows were imported to {opts.model_name}.')
                             if update_rows:
-                                self.model.objects.bulk_update(update_rows, self.get_update_fields())
+                                batch_size = self.get_bulk_update_batch_size()
+                                self.model.objects.bulk_update(update_rows, update_fields, batch_size=batch_size)
+                                if expression_update_values:
+                                    pks = [r.pk for r in update_rows]
+                                    for i in range(0, len(pks), batch_size):
+                                        self.model._default_manager.filter(pk__in=pks[i:i + batch_size]).update(**expression_update_values)
                                 logging.info(f'There are {len(update_rows)} rows were updated to {opts.model_name}.')
+
+                        # Release the chunk before reading the next one, to cap the memory of a long import
+                        del chunk, seen_new, seen_upd, pending, new_rows, update_rows
+                        gc.collect()
                 except Exception as e:      #todo: write exception info to log file
                     logging.exception(e)
                     raise e
                 finally:
-                    fs.delete(file_name)
+                    if executor:
+                        executor.shutdown()
+                    gc.collect()
 
                 if errors:
                     context['title'] = _('%(name)s import errors')% {'name': opts.verbose_name}
                     context['show_close'] = True
-                    context['forms'] = errors
-                    logging.info(f'There are {len(errors)} error records at {file_path} when importing it to {opts.model_name}.')
+                    field_names = list(modelform_class.base_fields)
+                    context['error_fields'] = [modelform_class.base_fields[f].label for f in field_names]
+                    context['import_errors'] = [{
+                        'row_number': e['row_number'],
+                        'cells': [(e['data'].get(f, ''), e['errors'].get(f, [])) for f in field_names],
+                        'non_field_errors': e['errors'].get(NON_FIELD_ERRORS, []),
+                    } for e in errors]
+                    logging.info(f'There are {len(errors)} error records at {import_file.name} when importing it to {opts.model_name}.')
                     return TemplateResponse(request, 'admin/import_error.html', context)
                 else:
                     # return super(CsvImportModelMixin, self).changelist_view(request=request)